@@ -1,63 +1,81 @@
-import json
-import boto3
 from app.database import get_db
-from app.models.models import JournalEntry
-from sqlalchemy.orm import Session, joinedload
-from fastapi.responses import StreamingResponse
-from .textract_endpoints import extract_text_from_pdf
-from app.crud.crud import AccountCRUD, JournalEntryCRUD
-from app.utils import validate_user_id, validate_filename
-from fastapi import APIRouter, UploadFile, HTTPException, Depends
-from .bedrock_endpoints import identify_transactions, validate_transaction
-from app.models.schemas import AccountSchema, PromptSchema, JournalEntrySchema, JournalEntryLineSchema
-from app.config import AWS_REGION, S3_BUCKET_NAME
-
-FILE_SIZE_LIMIT = 10 * 1024 * 1024  # 10MB
+from sqlalchemy.orm import Session
+from datetime import timezone
+from email.utils import format_datetime
+from fastapi.responses import Response, StreamingResponse
+from fastapi import APIRouter, UploadFile, HTTPException, Depends, Request
+from app.config import DOCUMENT_MAX_AGE, BATCH_MAX_FILES, BATCH_MAX_BYTES
+from app.models.schemas import AccountSchema, JournalEntrySchema, ProcessedDocumentSchema
+from app.services import ledger, storage, run_stage, process_document, process_uploaded_document, process_documents
+from app.services.errors import ServiceError, RangeNotSatisfiableError
 
 router = APIRouter()
-s3_client = boto3.client('s3', region_name=AWS_REGION)
 
 @router.get("/accounts", response_model=list[AccountSchema])
 async def list_accounts(db: Session = Depends(get_db)):
-	accounts = AccountCRUD.get_accounts(db)
+	accounts = ledger.list_accounts(db)
 	return accounts
 
 
 ### MAIN FLOW ENDPOINTS ###
 
-@router.post("/upload-and-process")
+@router.post("/upload-and-process", response_model=ProcessedDocumentSchema)
 async def upload_and_process(user_id: str, file: UploadFile, db: Session = Depends(get_db)):
 	try:
-		file_name = file.filename
 		file_content = await file.read()
-		if not file_content:
-			raise HTTPException(status_code=400, detail="Empty file uploaded.")
-
-		upload_details = await upload_to_s3(user_id, file_name, file_content)
-		extraction_details = await extract_text_from_pdf(file_content)
-		accounts = await list_accounts(db)
-		llm_response = await identify_transactions(PromptSchema(message=extraction_details["data"]), accounts)
-
-		try:
-			llm_response_json = json.loads(llm_response["response"])
-			journal_entries = JournalEntrySchema(**llm_response_json[0])
-		except json.JSONDecodeError:
-			raise HTTPException(status_code=500, detail="LLM response for Journal Entry is not valid JSON.")
-
-		llm_validation_response = await validate_transaction(PromptSchema(message=llm_response["response"]))
-		try:
-			validation_json = json.loads(llm_validation_response["response"])
-		except json.JSONDecodeError:
-			raise HTTPException(status_code=500, detail="LLM response for Validation is not valid JSON.")
+		return await process_document(db, user_id, file.filename, file_content)
+	except ServiceError as e:
+		raise HTTPException(status_code=e.status_code, detail=f"Error uploading/processing file: {str(e)}")
+	except Exception as e:
+		raise HTTPException(status_code=500, detail=f"Error uploading/processing file: {str(e)}")
 
-		return {
-			"s3_key": upload_details["s3_key"],
-			"data": journal_entries,
-			"validation": validation_json
-		}
+@router.post("/upload-complete", response_model=ProcessedDocumentSchema)
+async def upload_complete(user_id: str, s3_key: str, db: Session = Depends(get_db)):
+	"""
+	Process a document the client uploaded directly through a presigned URL (see POST /v0/db/s3/presigned-upload).
+	Example frontend call:
+		POST /v0/db/upload-complete?user_id={userId}&s3_key=documents/{userId}/file.pdf
+		Response: same as /upload-and-process
+	"""
+	try:
+		return await process_uploaded_document(db, user_id, s3_key)
+	except ServiceError as e:
+		raise HTTPException(status_code=e.status_code, detail=f"Error processing uploaded file: {str(e)}")
+	except Exception as e:
+		raise HTTPException(status_code=500, detail=f"Error processing uploaded file: {str(e)}")
 
+@router.post("/upload-and-process-batch")
+async def upload_and_process_batch(user_id: str, files: list[UploadFile], db: Session = Depends(get_db)):
+	"""
+	Run the upload-and-process pipeline over many documents at once.
+	Streams one JSON line per document as soon as it finishes (in completion order):
+		{"index": 0, "file_name": "a.pdf", "result": {"s3_key": ..., "data": ..., "validation": [...]}, "error": null}
+		{"index": 2, "file_name": "c.pdf", "result": null, "error": "Invalid file type. Only PDF, PNG, and JPEG are allowed."}
+	"""
+	if len(files) > BATCH_MAX_FILES:
+		raise HTTPException(status_code=400, detail=f"Batch exceeds {BATCH_MAX_FILES} files.")
+
+	documents = []
+	total_bytes = 0
+	for file in files:
+		# one byte past the limit is enough for the pipeline to reject an oversized file
+		file_content = await file.read(storage.FILE_SIZE_LIMIT + 1)
+		total_bytes += len(file_content)
+		if total_bytes > BATCH_MAX_BYTES:
+			raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_BYTES // (1024 * 1024)}MB in total.")
+		documents.append((file.filename, file_content))
+
+	try:
+		# resolved up front: the db session is closed before the response body streams
+		accounts = ledger.list_accounts(db)
 	except Exception as e:
-		raise HTTPException(status_code=500, detail=f"Error uploading/processing file: {str(e)}")
+		raise HTTPException(status_code=500, detail=f"Error loading accounts: {str(e)}")
+
+	async def stream_results():
+		async for result in process_documents(user_id, documents, accounts):
+			yield result.model_dump_json() + "\n"
+
+	return StreamingResponse(stream_results(), media_type="application/x-ndjson")
 
 
 ### RDS JOURNAL ENTRY ENDPOINTS ###
@@ -65,48 +83,14 @@ async def upload_and_process(user_id: str, file: UploadFile, db: Session = Depen
 @router.get("/journal-entry")
 async def get_journal_entries(db: Session = Depends(get_db)):
 	try:
-		entries = db.query(JournalEntry).options(joinedload(JournalEntry.lines)).all()
-		return [
-			JournalEntrySchema(
-				date=entry.date.isoformat(),
-				reference=entry.reference,
-				description=entry.description,
-				lines=[
-					JournalEntryLineSchema(
-						account_code=line.account_code,
-						debit=line.debit,
-						credit=line.credit,
-						description=line.description,
-					)
-					for line in entry.lines
-				]
-			)
-			for entry in entries
-		]
+		return ledger.get_journal_entries(db)
 	except Exception as e:
 		raise HTTPException(status_code=500, detail=f"Error fetching journal entries: {str(e)}")
 
 @router.post("/journal-entry")
 async def submit_journal_entry(journal_entry: JournalEntrySchema, db: Session = Depends(get_db)):
 	try:
-		with db.begin():
-			entry = JournalEntryCRUD.create_journal_entry(
-				db=db,
-				date=journal_entry.date,
-				reference=journal_entry.reference,
-				description=journal_entry.description
-			)
-
-			for line in journal_entry.lines:
-				JournalEntryCRUD.add_journal_line(
-					db=db,
-					journal_entry_id=entry.id,
-					account_code=int(line.account_code),
-					debit=line.debit,
-					credit=line.credit,
-					description=line.description
-				)
-		db.refresh(entry)
+		ledger.create_journal_entry(db, journal_entry)
 		return {"status": "success"}
 	except Exception as e:
 		db.rollback()
@@ -116,9 +100,46 @@ async def submit_journal_entry(journal_entry: JournalEntrySchema, db: Session =
 ### S3 ENDPOINTS ###
 
 @router.get("/s3")
-async def get_s3_object(s3_key: str):
-	s3_response = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=s3_key)
-	return StreamingResponse(s3_response['Body'], media_type='application/pdf', headers={"Content-Disposition": f"inline; filename={s3_key.split('/')[-1]}"})
+async def get_s3_object(s3_key: str, request: Request):
+	"""
+	Stream a document, honouring If-None-Match / If-Modified-Since (304) and single byte ranges (206).
+	Example frontend call:
+		GET /v0/db/s3?s3_key=documents/{userId}/file.pdf
+		Headers: If-None-Match: "<etag>" or Range: bytes=0-65535
+	"""
+	try:
+		document = await run_stage(
+			"storage",
+			storage.open_document,
+			s3_key,
+			request.headers.get("range"),
+			request.headers.get("if-none-match"),
+			request.headers.get("if-modified-since")
+		)
+	except RangeNotSatisfiableError as e:
+		headers = {"Content-Range": f"bytes */{e.total_size}"} if e.total_size is not None else None
+		raise HTTPException(status_code=e.status_code, detail=str(e), headers=headers)
+	except ServiceError as e:
+		raise HTTPException(status_code=e.status_code, detail=str(e))
+
+	headers = {"Cache-Control": f"private, max-age={DOCUMENT_MAX_AGE}", "Accept-Ranges": "bytes"}
+	if document.etag:
+		headers["ETag"] = document.etag
+	if document.last_modified:
+		headers["Last-Modified"] = format_datetime(document.last_modified.astimezone(timezone.utc), usegmt=True)
+	if document.not_modified:
+		return Response(status_code=304, headers=headers)
+
+	headers["Content-Disposition"] = f"inline; filename={s3_key.split('/')[-1]}"
+	status_code = 200
+	if document.byte_range:
+		start, end = document.byte_range
+		headers["Content-Range"] = f"bytes {start}-{end}/{document.total_size}"
+		headers["Content-Length"] = str(end - start + 1)
+		status_code = 206
+	elif document.total_size is not None:
+		headers["Content-Length"] = str(document.total_size)
+	return StreamingResponse(document.body, status_code=status_code, media_type='application/pdf', headers=headers)
 
 @router.post("/s3")
 async def upload_to_s3(user_id: str, file_name: str, file_content: bytes):
@@ -130,21 +151,40 @@ async def upload_to_s3(user_id: str, file_name: str, file_content: bytes):
 		Response: {"filename": "file.pdf", "s3_bucket": "my-bucket", "s3_key": "documents/{userId}/file.pdf", "user_id": "{userId}"}
 	"""
 	try:
-		validate_user_id(user_id)
-		validate_filename(file_name)
-
-		if len(file_content) > FILE_SIZE_LIMIT:
-			raise HTTPException(status_code=400, detail="File size exceeds 10MB limit.")
-
-		s3_key = f"documents/{user_id}/{file_name}"
-		s3_client.put_object(Bucket=S3_BUCKET_NAME, Key=s3_key, Body=file_content)
-		
+		s3_key = storage.put_document(user_id, file_name, file_content)
 		return {
 			"s3_key": s3_key,
 			"user_id": user_id
 		}
-	except Exception as e:
-		raise HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
+	except ServiceError as e:
+		raise HTTPException(status_code=e.status_code, detail=str(e))
+
+@router.post("/s3/presigned-upload")
+async def create_presigned_upload(user_id: str, file_name: str):
+	"""
+	Issue a URL the client PUTs the file to directly, so the bytes never pass through the API.
+	Example frontend call:
+		POST /v0/db/s3/presigned-upload?user_id={userId}&file_name=file.pdf
+		Response: {"url": "https://...", "s3_key": "documents/{userId}/file.pdf", "expires_in": 900}
+		then: PUT {url} with the file as the body, followed by POST /v0/db/upload-complete
+	"""
+	try:
+		return storage.presign_upload(user_id, file_name)
+	except ServiceError as e:
+		raise HTTPException(status_code=e.status_code, detail=str(e))
+
+@router.get("/s3/presigned-download")
+async def create_presigned_download(s3_key: str):
+	"""
+	Issue a short-lived URL the client GETs the document from directly.
+	Example frontend call:
+		GET /v0/db/s3/presigned-download?s3_key=documents/{userId}/file.pdf
+		Response: {"url": "https://...", "s3_key": "documents/{userId}/file.pdf", "expires_in": 900}
+	"""
+	try:
+		return storage.presign_download(s3_key)
+	except ServiceError as e:
+		raise HTTPException(status_code=e.status_code, detail=str(e))
 
 @router.get("/s3-list")
 async def list_user_files(user_id: str):
@@ -155,17 +195,6 @@ async def list_user_files(user_id: str):
 		Response: {"files": ["file1.pdf", "image1.png"]}
 	"""
 	try:
-		validate_user_id(user_id)
-
-		prefix = f"documents/{user_id}/"
-		response = s3_client.list_objects_v2(Bucket=S3_BUCKET_NAME, Prefix=prefix)
-		files = []
-		if 'Contents' in response:
-			for obj in response['Contents']:
-				filename = obj['Key'].replace(prefix, '', 1)
-				if filename:  # Exclude the prefix folder itself
-					files.append(filename)
-
-		return {"files": files}
-	except Exception as e:
-		raise HTTPException(status_code=500, detail=f"Error listing files: {str(e)}")
\ No newline at end of file
+		return {"files": storage.list_documents(user_id)}
+	except ServiceError as e:
+		raise HTTPException(status_code=e.status_code, detail=str(e))
\ No newline at end of file
@@ -5,4 +5,16 @@ RDS_DB_NAME = os.getenv('RDS_DB_NAME', '')
 RDS_USERNAME = os.getenv('RDS_USERNAME', '')
 RDS_PASSWORD = os.getenv('RDS_PASSWORD', '')
 AWS_REGION = 'ap-southeast-5'
-S3_BUCKET_NAME = 'ai-ams-bucket'
\ No newline at end of file
+S3_BUCKET_NAME = 'ai-ams-bucket'
+S3_ENDPOINT_URL = os.getenv('S3_ENDPOINT_URL') or None  # e.g. http://localhost:9000 for a local S3 stand-in (MinIO, moto_server)
+PRESIGNED_URL_EXPIRY = int(os.getenv('PRESIGNED_URL_EXPIRY', '900'))  # seconds
+DOCUMENT_MAX_AGE = int(os.getenv('DOCUMENT_MAX_AGE', '300'))  # seconds browsers (and the disk cache) reuse a document before revalidating
+DOCUMENT_CACHE_DIR = os.getenv('DOCUMENT_CACHE_DIR') or None  # set to enable the local disk cache of hot documents; one process per directory
+DOCUMENT_CACHE_MAX_BYTES = int(os.getenv('DOCUMENT_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+
+# Per-stage concurrency for batch processing (OCR is CPU-bound, Bedrock is quota-bound)
+S3_CONCURRENCY = int(os.getenv('S3_CONCURRENCY', '8'))
+EXTRACTION_CONCURRENCY = int(os.getenv('EXTRACTION_CONCURRENCY', str(os.cpu_count() or 1)))
+LLM_CONCURRENCY = int(os.getenv('LLM_CONCURRENCY', '4'))
+BATCH_MAX_FILES = int(os.getenv('BATCH_MAX_FILES', '100'))
+BATCH_MAX_BYTES = int(os.getenv('BATCH_MAX_BYTES', str(200 * 1024 * 1024)))
\ No newline at end of file
@@ -41,4 +41,15 @@ class ValidateIssueOutputSchema(BaseModel):
     value: str
     expected: str
     actionable_steps: list[ValidateOutputActionableSchema]
-    # created_at: str
\ No newline at end of file
+    # created_at: str
+
+class ProcessedDocumentSchema(BaseModel):
+	s3_key: str
+	data: JournalEntrySchema
+	validation: list[dict]
+
+class BatchDocumentResultSchema(BaseModel):
+	index: int  # position of the file in the batch request
+	file_name: str
+	result: ProcessedDocumentSchema | None = None
+	error: str | None = None
\ No newline at end of file
@@ -0,0 +1,7 @@
+from .errors import ServiceError, InvalidInputError, NotFoundError, RangeNotSatisfiableError, StorageError, ExtractionError, LLMError, LLMOutputError
+from .pipeline import run_stage, process_document, process_uploaded_document, process_documents
+
+__all__ = [
+	"ServiceError", "InvalidInputError", "NotFoundError", "RangeNotSatisfiableError", "StorageError", "ExtractionError", "LLMError", "LLMOutputError",
+	"run_stage", "process_document", "process_uploaded_document", "process_documents",
+]
\ No newline at end of file
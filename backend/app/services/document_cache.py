@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from datetime import datetime
+from typing import BinaryIO
+from collections import OrderedDict
+
+class CachedDocument:
+	def __init__(self, path: str, etag: str, last_modified: datetime, size: int):
+		self.path = path
+		self.etag = etag
+		self.last_modified = last_modified
+		self.size = size
+		self.validated_at = time.monotonic()  # last time S3 confirmed this copy is current
+
+class DocumentCache:
+	"""
+	Size-bounded LRU of document bodies on local disk, keyed by S3 key.
+	Each version is `<sha(key)>-<sha(etag)>.bin` plus a `.json` sidecar with its metadata, so
+	the cache survives restarts and a newer version never overwrites a file being streamed.
+	Safe to use from the worker threads the storage calls run in, but the index and byte count
+	live in memory: only one process may use a given directory.
+	"""
+
+	def __init__(self, directory: str, max_bytes: int):
+		self.directory = directory
+		self.max_bytes = max_bytes
+		self._entries: OrderedDict[str, CachedDocument] = OrderedDict()  # least recently used first
+		self._total_bytes = 0
+		self._lock = threading.Lock()
+		os.makedirs(directory, exist_ok=True)
+		self._load()
+
+	def _base_path(self, s3_key: str, etag: str) -> str:
+		key_hash = hashlib.sha256(s3_key.encode()).hexdigest()
+		etag_hash = hashlib.sha256(etag.encode()).hexdigest()[:16]
+		return os.path.join(self.directory, f"{key_hash}-{etag_hash}")
+
+	def _load(self):
+		sidecars = [name for name in os.listdir(self.directory) if name.endswith(".json")]
+		loaded = []
+		for name in sidecars:
+			sidecar_path = os.path.join(self.directory, name)
+			try:
+				with open(sidecar_path) as f:
+					meta = json.load(f)
+				path = sidecar_path[:-len(".json")] + ".bin"
+				loaded.append((os.path.getmtime(path), meta["s3_key"], CachedDocument(
+					path, meta["etag"], datetime.fromisoformat(meta["last_modified"]), os.path.getsize(path)
+				)))
+			except (OSError, ValueError, KeyError):
+				continue
+		for _, s3_key, entry in sorted(loaded, key=lambda item: item[0]):
+			entry.validated_at = 0.0  # unknown freshness after a restart: revalidate on first use
+			self._entries[s3_key] = entry
+			self._total_bytes += entry.size
+		self._evict()
+
+	def get(self, s3_key: str) -> CachedDocument | None:
+		with self._lock:
+			entry = self._entries.get(s3_key)
+			if entry is not None:
+				self._entries.move_to_end(s3_key)
+			return entry
+
+	def open(self, s3_key: str) -> tuple[CachedDocument, BinaryIO] | None:
+		"""
+		Current entry for the key with its file already open, so a later eviction or
+		replacement cannot pull the bytes out from under the caller. None if absent.
+		"""
+		with self._lock:
+			entry = self._entries.get(s3_key)
+			if entry is None:
+				return None
+			try:
+				f = open(entry.path, "rb")
+			except FileNotFoundError:
+				# removed behind our back: forget it so the caller refetches
+				self._entries.pop(s3_key)
+				self._total_bytes -= entry.size
+				return None
+			self._entries.move_to_end(s3_key)
+			return entry, f
+
+	def mark_validated(self, s3_key: str):
+		with self._lock:
+			entry = self._entries.get(s3_key)
+			if entry is not None:
+				entry.validated_at = time.monotonic()
+
+	def put(self, s3_key: str, content: bytes, etag: str, last_modified: datetime) -> CachedDocument | None:
+		if len(content) > self.max_bytes:
+			return None
+
+		base_path = self._base_path(s3_key, etag)
+		# write then rename, so readers never see a partial file
+		with tempfile.NamedTemporaryFile(dir=self.directory, delete=False) as tf:
+			tf.write(content)
+		os.replace(tf.name, base_path + ".bin")
+		with open(base_path + ".json", "w") as f:
+			json.dump({"s3_key": s3_key, "etag": etag, "last_modified": last_modified.isoformat()}, f)
+
+		entry = CachedDocument(base_path + ".bin", etag, last_modified, len(content))
+		with self._lock:
+			previous = self._entries.get(s3_key)
+			if previous is not None and previous.last_modified > last_modified:
+				# a slower fetch of an older version lost the race: keep the newer copy
+				if previous.path != entry.path:
+					self._remove_files(entry)
+				return previous
+			self._entries.pop(s3_key, None)
+			if previous is not None:
+				self._total_bytes -= previous.size
+				if previous.path != entry.path:
+					self._remove_files(previous)
+			self._entries[s3_key] = entry
+			self._total_bytes += entry.size
+			self._evict()
+		return entry
+
+	def discard(self, s3_key: str):
+		with self._lock:
+			entry = self._entries.pop(s3_key, None)
+			if entry is not None:
+				self._total_bytes -= entry.size
+				self._remove_files(entry)
+
+	def _evict(self):
+		while self._total_bytes > self.max_bytes and self._entries:
+			_, entry = self._entries.popitem(last=False)
+			self._total_bytes -= entry.size
+			self._remove_files(entry)
+
+	@staticmethod
+	def _remove_files(entry: CachedDocument):
+		# open readers keep streaming from the unlinked file
+		for path in (entry.path, entry.path[:-len(".bin")] + ".json"):
+			try:
+				os.unlink(path)
+			except FileNotFoundError:
+				pass
\ No newline at end of file
@@ -0,0 +1,31 @@
+class ServiceError(Exception):
+	"""
+	Base error for the service layer. Services never raise HTTPException;
+	endpoints translate these into HTTP responses using `status_code`.
+	"""
+	status_code = 500
+
+class InvalidInputError(ServiceError):
+	status_code = 400
+
+class NotFoundError(ServiceError):
+	status_code = 404
+
+class RangeNotSatisfiableError(ServiceError):
+	status_code = 416
+
+	def __init__(self, message: str, total_size: int | None = None):
+		super().__init__(message)
+		self.total_size = total_size
+
+class StorageError(ServiceError):
+	pass
+
+class ExtractionError(ServiceError):
+	pass
+
+class LLMError(ServiceError):
+	pass
+
+class LLMOutputError(LLMError):
+	"""The model responded, but not with anything we could parse."""
\ No newline at end of file
@@ -0,0 +1,48 @@
+import io
+import pymupdf
+import pytesseract
+import pymupdf4llm
+from PIL import Image
+from .errors import InvalidInputError, ExtractionError
+
+def _ocr_images(doc: pymupdf.Document) -> str:
+	extracted_text = []
+	for page in doc:
+		for img_index, img in enumerate(page.get_images(full=True)):
+			xref = img[0]
+			base_image = doc.extract_image(xref)
+			image_bytes = base_image["image"]
+
+			image = Image.open(io.BytesIO(image_bytes))
+			text = pytesseract.image_to_string(image)
+			if text.strip():
+				extracted_text.append(
+					f"### Page {page.number + 1}, Image {img_index + 1}\n\n{text.strip()}\n"
+				)
+	return "\n".join(extracted_text)
+
+def extract_text(file_content: bytes) -> str:
+	"""
+	Markdown for a PDF, falling back to OCR of embedded images for scanned documents.
+	PNG/JPEG uploads are OCR'd directly. CPU-bound and blocking: run it in the extraction stage.
+	"""
+	if not file_content:
+		raise InvalidInputError("Empty file uploaded.")
+
+	try:
+		# open from memory instead of round-tripping through a temp file
+		with pymupdf.open(stream=file_content) as doc:
+			is_pdf = doc.is_pdf
+			if is_pdf:
+				doc_content = pymupdf4llm.to_markdown(doc)
+
+		if not is_pdf:
+			doc_content = pytesseract.image_to_string(Image.open(io.BytesIO(file_content)))
+		elif not doc_content.strip():
+			# to_markdown may close the document it was given, so OCR from a fresh one
+			with pymupdf.open(stream=file_content, filetype="pdf") as doc:
+				doc_content = _ocr_images(doc)
+	except Exception as e:
+		raise ExtractionError(f"Error during text extraction: {e}") from e
+
+	return doc_content.strip()
\ No newline at end of file
@@ -0,0 +1,110 @@
+import re
+import json
+from typing import Any, Iterator
+from .errors import LLMOutputError
+
+_OPENERS = {"{": "}", "[": "]"}
+_TRAILING_COMMA = re.compile(r",\s*([\]}])")
+
+
+def _loads_lenient(text: str) -> Any:
+	try:
+		return json.loads(text)
+	except json.JSONDecodeError:
+		# models like to leave a trailing comma before a closing bracket
+		return json.loads(_TRAILING_COMMA.sub(r"\1", text))
+
+
+class JSONStreamExtractor:
+	"""
+	Incrementally pulls complete top-level JSON objects/arrays out of model output.
+	Anything around them (prose, markdown code fences, half-finished values) is skipped,
+	and each candidate is only parsed once its brackets balance.
+	Example:
+		extractor = JSONStreamExtractor()
+		extractor.feed('Sure! ```json\\n[{"a": 1},')  # -> []
+		extractor.feed(' {"b": 2}]\\n```')            # -> [[{"a": 1}, {"b": 2}]]
+	"""
+
+	def __init__(self):
+		self._buffer = ""
+		self._pos = 0       # next index of the buffer to scan
+		self._start = -1    # index of the opening bracket of the current candidate
+		self._closers: list[str] = []
+		self._in_string = False
+		self._escape = False
+
+	def _reset_candidate(self):
+		self._start = -1
+		self._closers = []
+		self._in_string = False
+		self._escape = False
+
+	def feed(self, chunk: str) -> list[Any]:
+		self._buffer += chunk
+		buf = self._buffer
+		values = []
+		i = self._pos
+
+		while i < len(buf):
+			ch = buf[i]
+			if self._start < 0:
+				if ch in _OPENERS:
+					self._start = i
+					self._closers = [_OPENERS[ch]]
+			elif self._in_string:
+				if self._escape:
+					self._escape = False
+				elif ch == "\\":
+					self._escape = True
+				elif ch == '"':
+					self._in_string = False
+			elif ch == '"':
+				self._in_string = True
+			elif ch in _OPENERS:
+				self._closers.append(_OPENERS[ch])
+			elif ch in "]}":
+				if ch != self._closers.pop():
+					# mismatched bracket: this was not JSON, rescan just past its start
+					i = self._start
+					self._reset_candidate()
+				elif not self._closers:
+					try:
+						values.append(_loads_lenient(buf[self._start:i + 1]))
+					except json.JSONDecodeError:
+						i = self._start
+					self._reset_candidate()
+			i += 1
+
+		# drop everything that can no longer be part of a value
+		keep_from = self._start if self._start >= 0 else i
+		self._buffer = buf[keep_from:]
+		self._pos = i - keep_from
+		if self._start >= 0:
+			self._start = 0
+		return values
+
+
+def iter_json_values(text: str) -> Iterator[Any]:
+	yield from JSONStreamExtractor().feed(text)
+
+def _is_object_payload(value: Any) -> bool:
+	if isinstance(value, dict):
+		return bool(value)
+	return isinstance(value, list) and any(isinstance(item, dict) for item in value)
+
+def extract_json(text: str) -> Any:
+	"""
+	Return the first JSON object, or array containing objects, embedded in `text`.
+	Other bracketed values (e.g. a "[1]" footnote in the prose) are skipped; an empty
+	`[]`/`{}` ("nothing found") is only returned when no such payload exists.
+	"""
+	empty = None
+	for value in iter_json_values(text):
+		if _is_object_payload(value):
+			return value
+		if empty is None and value in ([], {}):
+			empty = value
+	if empty is not None:
+		return empty
+	raise LLMOutputError("LLM response does not contain valid JSON.")
\ No newline at end of file
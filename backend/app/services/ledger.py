@@ -0,0 +1,48 @@
+from sqlalchemy.orm import Session, joinedload
+from app.models.models import Account, JournalEntry
+from app.crud.crud import AccountCRUD, JournalEntryCRUD
+from app.models.schemas import JournalEntrySchema, JournalEntryLineSchema
+
+def list_accounts(db: Session) -> list[Account]:
+	return AccountCRUD.get_accounts(db)
+
+def get_journal_entries(db: Session) -> list[JournalEntrySchema]:
+	entries = db.query(JournalEntry).options(joinedload(JournalEntry.lines)).all()
+	return [
+		JournalEntrySchema(
+			date=entry.date.isoformat(),
+			reference=entry.reference,
+			description=entry.description,
+			lines=[
+				JournalEntryLineSchema(
+					account_code=line.account_code,
+					debit=line.debit,
+					credit=line.credit,
+					description=line.description,
+				)
+				for line in entry.lines
+			]
+		)
+		for entry in entries
+	]
+
+def create_journal_entry(db: Session, journal_entry: JournalEntrySchema) -> JournalEntry:
+	with db.begin():
+		entry = JournalEntryCRUD.create_journal_entry(
+			db=db,
+			date=journal_entry.date,
+			reference=journal_entry.reference,
+			description=journal_entry.description
+		)
+
+		for line in journal_entry.lines:
+			JournalEntryCRUD.add_journal_line(
+				db=db,
+				journal_entry_id=entry.id,
+				account_code=int(line.account_code),
+				debit=line.debit,
+				credit=line.credit,
+				description=line.description
+			)
+	db.refresh(entry)
+	return entry
\ No newline at end of file
@@ -0,0 +1,134 @@
+import json
+import boto3
+from typing import Any, Sequence
+from app.models.models import Account
+from app.models.schemas import AccountSchema, JournalEntrySchema
+from .errors import LLMError, LLMOutputError
+from .json_stream import extract_json
+
+# Note: this AWS region is not the same as the one set in the app.config
+AWS_REGION = 'us-east-1'
+MODEL_ID = 'meta.llama3-8b-instruct-v1:0'
+
+bedrock_client = boto3.client(service_name="bedrock-runtime", region_name=AWS_REGION)
+
+VALIDATION_SYSTEM_PROMPT = "STRICTLY FOLLOW THESE DIRECTIVES:\n\
+You are an experienced accountant who specializes in applying their knowledge in MPERS \
+to review and categorize compliancy failures when given a JSON representation of transactions. \
+You have years of experience in the Malaysian accounting market, so you will validate based on your experience. \
+You thoroughly read through the details in every transaction given to you, and if something does not make sense, you raise it. \
+You deeply appreciate compliant documents, and will not hesitate to point out anything wrong. \
+You will never wrongly raise compliancy issues when given a perfectly compliant document. \
+Your response should be a JSON array of objects, each object strictly follows the structure below:\n{\
+'journal_entry_id': 'index of the compliance issue found in the input json',\
+'type': 'will only be the words \'error\', \'warning\', or \'info\' based on the severity of the compliance issue found',\
+'category': 'will be based on MPERS on how to categorize compliance issues',\
+'title': 'title of the compliance issue found',\
+'description': 'explanation of why the value found is not compliant with MPERS',\
+'field': 'key value pair from the input json found to be not compliant with MPERS',\
+'value': 'value found in the json to be non-compliant with MPERS, this should be a string value',\
+'expected': 'expected value to be compliant with MPERS, this should be a string value',\
+'actionable_steps':[{\
+'title': 'title of the actionable steps that can be taken to resolve the compliance issue',\
+'description': 'explaining the step to resolve the compliance issue',\
+'action_type': 'action name that the user has to take to resolve the compliance issue',\
+'estimated_time': 'estimated time for someone to resolve the compliance issue'}]}. \
+DO NOT HALLUCINATE IF NO COMPLIANCE ERRORS ARE FOUND. DO NOT RESPOND IN A NON-JSON FORMAT, DO NOT ADD ANYTHING NOT EXPLICITLY REQUESTED."
+
+CHAT_SYSTEM_PROMPT = "STRICTLY FOLLOW THESE DIRECTIVES:\n\
+You are an experienced CFO of 20 years with deep expertise in financial management and accountancy \
+who specializes in applying their knowledge in MPERS and providing strategic financial insights to improve business \
+operations and compliance. As a CFO, you understand the broader business implications of accounting compliance issues\
+and can recommend actionable steps that align with business objectives while maintaining regulatory compliance.\
+You have deep knowledge of how MPERS standards impact financial reporting, cash flow management,\
+and strategic decision-making processes. Be straight to the point, do not add filler, time is of the essence. \
+You absolutely hate when someone goes off-topic when you are focused on the task given. But even with your infinite knowledge, \
+you stay humble and keep conversations short and to the point. Interactions with you are in chat form, your responses are stored, \
+small details do not matter unless requested. \
+DO NOT HALLUCINATE. DO NOT ADD ANYTHING NOT EXPLICITLY REQUESTED."
+
+def identification_system_prompt(accounts: Sequence[AccountSchema | Account]) -> str:
+	accounts_str = ",".join(f"{acc.code}:{acc.name}({acc.type}))" for acc in accounts)
+	return "STRICTLY FOLLOW THESE DIRECTIVES:\n\
+You are an experienced accountant, well versed with the MPERS policy, who helps users thoroughly identify \
+and categorize transactions, given the markdown representation of invoices or receipts. As a professional accountant,\
+you take input documents and process them as is, leaving in mistakes originating from the documents for the \
+user to correct. You want to allow the user to learn from mistakes.\
+You are a master of identifying debits and credits through messy markdown generated from OCR results of pdf scans. \
+You are an expert at analysing and explaining transactions to laymen who ask for exaplanations (description). \
+You are the best in the world at cross-checking and identifying correct Account Types and Codes for transactions.\
+You only communicate in JSON format. Your response should be a JSON array of objects, each object following the below structure:\n\
+{'date': 'Date inferred from the document IN ISO FORMAT',\
+'reference': 'Invoice reference or number inferred from the document',\
+'description': 'LLM generated description of the document',\
+'lines': [{'account_code': 'Relevant INTEGER ACCOUNT CODE according to the available list, based on most relevant description of the transaction (" + accounts_str + ")',\
+'debit': 'float amount derived from the relavant transaction',\
+'credit': 'float amount derived from the relavant transaction',\
+'description': 'LLM generated transaction description'}, ...]}\n\
+The user will send a message containing only the markdown generated from OCR. \
+If you can't identify any transactions, return an empty JSON object. \
+DO NOT HALLUCINATE. DO NOT RESPOND IN A NON-JSON FORMAT, DO NOT ADD ANYTHING NOT EXPLICITLY REQUESTED."
+
+def estimate_tokens(messages: list[dict]):
+	"""
+	Rough estimate of token usage based on message text length.
+	Uses ~4 chars per token heuristic.
+	"""
+	total_chars = sum(len(msg["content"][0]["text"]) for msg in messages)
+	return total_chars // 4
+
+def converse(
+		system_prompt: str,
+		user_prompt: str,
+		temperature: float = 0.3,
+		top_p: float = 0.4,
+		tokens: int = 2048,
+		chat_history=None
+	) -> str:
+	"""Send a prompt to Bedrock and return the raw model text. Blocking."""
+	messages = chat_history[:] if chat_history else []
+	messages.append({"role": "user", "content": [{"text": user_prompt}]})
+
+	# prune oldest messages until under budget
+	while estimate_tokens(messages) > tokens:
+		if len(messages) > 1:  # don't drop the latest prompt
+			messages.pop(0)
+		else:
+			break
+
+	try:
+		response = bedrock_client.converse(
+			modelId=MODEL_ID,
+			messages=messages,
+			system=[{"text": system_prompt}],
+			inferenceConfig={"maxTokens": tokens, "temperature": temperature, "topP": top_p}
+		)
+		return response["output"]["message"]["content"][0]["text"].strip()
+	except Exception as e:
+		raise LLMError(f"Error with bedrock-runtime ({MODEL_ID}). Reason: {e}") from e
+
+def _as_object_list(value: Any) -> list[dict]:
+	# the prompts ask for an array, but a lone object (or {} for "nothing found") also comes back
+	if isinstance(value, dict):
+		return [value] if value else []
+	return [item for item in value if isinstance(item, dict)]
+
+def identify_transactions(
+		markdown: str,
+		accounts: Sequence[AccountSchema | Account]
+	) -> list[JournalEntrySchema]:
+	response_text = converse(identification_system_prompt(accounts), markdown)
+	try:
+		return [JournalEntrySchema(**entry) for entry in _as_object_list(extract_json(response_text))]
+	except LLMOutputError:
+		raise LLMOutputError("LLM response for Journal Entry is not valid JSON.")
+	except (TypeError, ValueError) as e:
+		raise LLMOutputError(f"LLM response for Journal Entry does not match the schema: {e}") from e
+
+def validate_transactions(entries: Sequence[JournalEntrySchema]) -> list[dict]:
+	message = json.dumps([entry.model_dump(mode="json") for entry in entries])
+	response_text = converse(VALIDATION_SYSTEM_PROMPT, message)
+	try:
+		return _as_object_list(extract_json(response_text))
+	except LLMOutputError:
+		raise LLMOutputError("LLM response for Validation is not valid JSON.")
\ No newline at end of file
@@ -0,0 +1,108 @@
+import os
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, Sequence
+from sqlalchemy.orm import Session
+from app.models.models import Account
+from app.models.schemas import ProcessedDocumentSchema, BatchDocumentResultSchema
+from app.config import S3_CONCURRENCY, EXTRACTION_CONCURRENCY, LLM_CONCURRENCY
+from . import extraction, ledger, llm, storage
+from .errors import ExtractionError, LLMOutputError, ServiceError
+
+def _extraction_executor() -> Executor:
+	# PyMuPDF is not thread-safe and pymupdf4llm is GIL-bound Python, so extraction gets
+	# real processes. Lambda has no /dev/shm for multiprocessing: one document at a time there.
+	if os.getenv('AWS_LAMBDA_FUNCTION_NAME'):
+		return ThreadPoolExecutor(1, thread_name_prefix="pipeline-extraction")
+	return ProcessPoolExecutor(EXTRACTION_CONCURRENCY, mp_context=multiprocessing.get_context("spawn"))
+
+# One pool per stage so each stage is capped independently (OCR by cores, Bedrock by quota)
+# and a backlog in one stage never starves the others of workers. Shared process-wide,
+# since both limits are properties of the machine/account rather than of a request.
+_stage_executors = {
+	"storage": ThreadPoolExecutor(S3_CONCURRENCY, thread_name_prefix="pipeline-s3"),
+	"extraction": _extraction_executor(),
+	"llm": ThreadPoolExecutor(LLM_CONCURRENCY, thread_name_prefix="pipeline-llm"),
+}
+
+async def run_stage(stage: str, func, *args, **kwargs):
+	"""Run a blocking service call on its stage's pool; endpoints use this too so the limits hold process-wide."""
+	executor = _stage_executors[stage]
+	try:
+		return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(func, *args, **kwargs))
+	except BrokenProcessPool as e:
+		# a worker died (e.g. PyMuPDF crashed on a malformed file): replace the pool for later calls
+		if _stage_executors[stage] is executor:
+			_stage_executors[stage] = _extraction_executor()
+		raise ExtractionError("Text extraction worker crashed.") from e
+
+async def _process(
+		user_id: str,
+		file_name: str,
+		file_content: bytes,
+		accounts: Sequence[Account]
+	) -> ProcessedDocumentSchema:
+	# reject bad files before they take a slot in either pool
+	storage.validate_document(user_id, file_name, file_content)
+	# the upload and the extraction only depend on the file bytes, so overlap them
+	s3_key, markdown = await asyncio.gather(
+		run_stage("storage", storage.put_document, user_id, file_name, file_content),
+		run_stage("extraction", extraction.extract_text, file_content),
+	)
+	return await _identify_and_validate(s3_key, markdown, accounts)
+
+async def _identify_and_validate(
+		s3_key: str,
+		markdown: str,
+		accounts: Sequence[Account]
+	) -> ProcessedDocumentSchema:
+	entries = await run_stage("llm", llm.identify_transactions, markdown, accounts)
+	if not entries:
+		raise LLMOutputError("LLM could not identify any transactions in the document.")
+	validation = await run_stage("llm", llm.validate_transactions, entries)
+
+	return ProcessedDocumentSchema(s3_key=s3_key, data=entries[0], validation=validation)
+
+async def process_document(db: Session, user_id: str, file_name: str, file_content: bytes) -> ProcessedDocumentSchema:
+	"""
+	S3 upload -> text extraction -> transaction identification -> validation.
+	Stages exchange parsed objects; the blocking boto3/OCR calls run in per-stage worker pools.
+	"""
+	return await _process(user_id, file_name, file_content, ledger.list_accounts(db))
+
+async def process_uploaded_document(db: Session, user_id: str, s3_key: str) -> ProcessedDocumentSchema:
+	"""Same pipeline for a document the client already PUT to S3 through a presigned URL."""
+	file_content = await run_stage("storage", storage.read_uploaded_document, user_id, s3_key)
+	markdown = await run_stage("extraction", extraction.extract_text, file_content)
+	return await _identify_and_validate(s3_key, markdown, ledger.list_accounts(db))
+
+async def process_documents(
+		user_id: str,
+		files: Sequence[tuple[str, bytes]],
+		accounts: Sequence[Account]
+	) -> AsyncIterator[BatchDocumentResultSchema]:
+	"""
+	Run the pipeline over `(file_name, file_content)` pairs, yielding each result as soon as
+	it finishes (not in input order). A failing document yields an error result instead
+	of aborting the batch.
+	"""
+	async def run(index: int, file_name: str, file_content: bytes) -> BatchDocumentResultSchema:
+		try:
+			result = await _process(user_id, file_name, file_content, accounts)
+			return BatchDocumentResultSchema(index=index, file_name=file_name, result=result)
+		except ServiceError as e:
+			return BatchDocumentResultSchema(index=index, file_name=file_name, error=str(e))
+		except Exception as e:
+			return BatchDocumentResultSchema(index=index, file_name=file_name, error=f"Unexpected error: {e}")
+
+	tasks = [asyncio.create_task(run(i, name, content)) for i, (name, content) in enumerate(files)]
+	try:
+		for next_done in asyncio.as_completed(tasks):
+			yield await next_done
+	finally:
+		# the client went away mid-stream: stop feeding the remaining documents through
+		for task in tasks:
+			task.cancel()
\ No newline at end of file
@@ -0,0 +1,331 @@
+import re
+import time
+import boto3
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterator
+from email.utils import parsedate_to_datetime
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from app.config import (
+	AWS_REGION, S3_BUCKET_NAME, S3_ENDPOINT_URL, PRESIGNED_URL_EXPIRY,
+	DOCUMENT_MAX_AGE, DOCUMENT_CACHE_DIR, DOCUMENT_CACHE_MAX_BYTES
+)
+from .validation import validate_user_id, validate_filename
+from .document_cache import CachedDocument, DocumentCache
+from .errors import InvalidInputError, NotFoundError, RangeNotSatisfiableError, StorageError
+
+FILE_SIZE_LIMIT = 10 * 1024 * 1024  # 10MB
+
+s3_client = boto3.client(
+	's3',
+	region_name=AWS_REGION,
+	endpoint_url=S3_ENDPOINT_URL,
+	config=Config(signature_version='s3v4')  # required for presigned URLs in newer regions
+)
+document_cache = DocumentCache(DOCUMENT_CACHE_DIR, DOCUMENT_CACHE_MAX_BYTES) if DOCUMENT_CACHE_DIR else None
+
+CHUNK_SIZE = 64 * 1024
+_BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def document_prefix(user_id: str) -> str:
+	return f"documents/{user_id}/"
+
+def validate_document_key(user_id: str, s3_key: str):
+	validate_user_id(user_id)
+	if not s3_key.startswith(document_prefix(user_id)):
+		raise InvalidInputError("s3_key does not belong to this user.")
+	validate_filename(s3_key.split('/')[-1])
+
+def validate_document(user_id: str, file_name: str, file_content: bytes):
+	"""Checks `put_document` applies (PDF or image, max size 10MB), cheap enough to run before any stage."""
+	validate_user_id(user_id)
+	validate_filename(file_name)
+
+	if not file_content:
+		raise InvalidInputError("Empty file uploaded.")
+	if len(file_content) > FILE_SIZE_LIMIT:
+		raise InvalidInputError("File size exceeds 10MB limit.")
+
+def put_document(user_id: str, file_name: str, file_content: bytes) -> str:
+	"""Validate and store a document, returning its S3 key."""
+	validate_document(user_id, file_name, file_content)
+
+	s3_key = document_prefix(user_id) + file_name
+	try:
+		s3_client.put_object(Bucket=S3_BUCKET_NAME, Key=s3_key, Body=file_content)
+	except Exception as e:
+		raise StorageError(f"Error uploading file: {e}") from e
+	if document_cache is not None:
+		document_cache.discard(s3_key)
+	return s3_key
+
+def get_document(s3_key: str, **params) -> dict:
+	"""
+	Raw `get_object` response; the caller streams `["Body"]`.
+	`params` are extra `get_object` arguments (Range, IfNoneMatch, ...). When a conditional
+	get finds the object unchanged, the result has no Body: only `NotModified`, `ETag`
+	and `LastModified`.
+	"""
+	try:
+		return s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=s3_key, **params)
+	except ClientError as e:
+		metadata = e.response.get('ResponseMetadata', {})
+		headers = metadata.get('HTTPHeaders', {})
+		status_code = metadata.get('HTTPStatusCode')
+		if status_code == 304:
+			return {
+				'NotModified': True,
+				'ETag': headers.get('etag'),
+				'LastModified': _parse_http_date(headers.get('last-modified'))
+			}
+		if status_code == 404:
+			raise NotFoundError(f"File not found: {s3_key}")
+		if status_code == 416:
+			# S3 reports the object size in the error body; other stand-ins may send "bytes */N"
+			total_size = e.response.get('Error', {}).get('ActualObjectSize') or headers.get('content-range', '').rpartition('/')[2]
+			raise RangeNotSatisfiableError(
+				"Requested range is not satisfiable.",
+				int(total_size) if str(total_size).isdigit() else None
+			)
+		raise StorageError(f"Error fetching file: {e}") from e
+	except Exception as e:
+		raise StorageError(f"Error fetching file: {e}") from e
+
+def list_documents(user_id: str) -> list[str]:
+	validate_user_id(user_id)
+
+	prefix = document_prefix(user_id)
+	try:
+		response = s3_client.list_objects_v2(Bucket=S3_BUCKET_NAME, Prefix=prefix)
+	except Exception as e:
+		raise StorageError(f"Error listing files: {e}") from e
+
+	files = []
+	for obj in response.get('Contents', []):
+		filename = obj['Key'].replace(prefix, '', 1)
+		if filename:  # Exclude the prefix folder itself
+			files.append(filename)
+	return files
+
+def read_uploaded_document(user_id: str, s3_key: str) -> bytes:
+	"""Fetch a document the client uploaded directly (see `presign_upload`), enforcing the size limit."""
+	validate_document_key(user_id, s3_key)
+	# the client may have overwritten a key we already cache
+	if document_cache is not None:
+		document_cache.discard(s3_key)
+
+	s3_response = get_document(s3_key)
+	if s3_response['ContentLength'] > FILE_SIZE_LIMIT:
+		s3_response['Body'].close()
+		raise InvalidInputError("File size exceeds 10MB limit.")
+	try:
+		file_content = s3_response['Body'].read()
+	except Exception as e:
+		raise StorageError(f"Error fetching file: {e}") from e
+
+	if not file_content:
+		raise InvalidInputError("Empty file uploaded.")
+	return file_content
+
+def presign_upload(user_id: str, file_name: str, expires_in: int = PRESIGNED_URL_EXPIRY) -> dict:
+	"""
+	URL the client can PUT the file body to directly, bypassing the API.
+	A presigned PUT cannot cap the body size, so the limit is enforced by `read_uploaded_document`.
+	"""
+	validate_user_id(user_id)
+	validate_filename(file_name)
+
+	s3_key = document_prefix(user_id) + file_name
+	try:
+		url = s3_client.generate_presigned_url(
+			'put_object',
+			Params={'Bucket': S3_BUCKET_NAME, 'Key': s3_key},
+			ExpiresIn=expires_in
+		)
+	except Exception as e:
+		raise StorageError(f"Error creating upload URL: {e}") from e
+	return {"url": url, "s3_key": s3_key, "expires_in": expires_in}
+
+def presign_download(s3_key: str, expires_in: int = PRESIGNED_URL_EXPIRY) -> dict:
+	try:
+		url = s3_client.generate_presigned_url(
+			'get_object',
+			Params={
+				'Bucket': S3_BUCKET_NAME,
+				'Key': s3_key,
+				'ResponseContentType': 'application/pdf',
+				'ResponseContentDisposition': f"inline; filename={s3_key.split('/')[-1]}"
+			},
+			ExpiresIn=expires_in
+		)
+	except Exception as e:
+		raise StorageError(f"Error creating download URL: {e}") from e
+	return {"url": url, "s3_key": s3_key, "expires_in": expires_in}
+
+
+class DocumentObject:
+	"""(Part of) a stored document with the metadata needed for HTTP caching headers."""
+	def __init__(
+			self,
+			etag: str | None,
+			last_modified: datetime | None = None,
+			total_size: int | None = None,
+			body: Iterator[bytes] | None = None,
+			byte_range: tuple[int, int] | None = None
+		):
+		self.etag = etag
+		self.last_modified = last_modified
+		self.total_size = total_size
+		self.body = body
+		self.byte_range = byte_range  # inclusive (start, end) when only part of the document is sent
+
+	@property
+	def not_modified(self) -> bool:
+		return self.body is None
+
+def parse_byte_range(range_header: str | None, total_size: int) -> tuple[int, int] | None:
+	"""
+	Inclusive (start, end) for a single `bytes=` range, or None to send the whole document.
+	Unparseable or multi-part ranges are ignored, as RFC 9110 allows.
+	"""
+	match = _BYTE_RANGE.match(range_header.strip()) if range_header else None
+	if not match or match.group(1) == match.group(2) == "":
+		return None
+
+	start, end = match.groups()
+	if start == "":
+		suffix_length = int(end)
+		if suffix_length == 0:
+			raise RangeNotSatisfiableError("Requested range is not satisfiable.", total_size)
+		return max(0, total_size - suffix_length), total_size - 1
+
+	start = int(start)
+	if end and int(end) < start:
+		return None
+	if start >= total_size:
+		raise RangeNotSatisfiableError("Requested range is not satisfiable.", total_size)
+	end = min(int(end), total_size - 1) if end else total_size - 1
+	return start, end
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+	def strip_weak(tag: str) -> str:
+		return tag[2:] if tag.startswith("W/") else tag
+	tags = [tag.strip() for tag in if_none_match.split(",")]
+	return "*" in tags or strip_weak(etag) in (strip_weak(tag) for tag in tags)
+
+def _parse_http_date(value: str | None) -> datetime | None:
+	try:
+		parsed = parsedate_to_datetime(value) if value else None
+	except (TypeError, ValueError):
+		return None
+	# a "-0000" zone parses as naive; HTTP dates are always GMT
+	if parsed is not None and parsed.tzinfo is None:
+		parsed = parsed.replace(tzinfo=timezone.utc)
+	return parsed
+
+def _is_not_modified(etag: str, last_modified: datetime, if_none_match: str | None, if_modified_since: str | None) -> bool:
+	# If-Modified-Since only counts when there is no If-None-Match (RFC 9110 13.1.3)
+	if if_none_match:
+		return _etag_matches(if_none_match, etag)
+	since = _parse_http_date(if_modified_since)
+	return since is not None and last_modified.replace(microsecond=0) <= since
+
+def _iter_file(f: BinaryIO, start: int, end: int) -> Iterator[bytes]:
+	with f:
+		f.seek(start)
+		remaining = end - start + 1
+		while remaining > 0:
+			chunk = f.read(min(CHUNK_SIZE, remaining))
+			if not chunk:
+				break
+			remaining -= len(chunk)
+			yield chunk
+
+def _fresh_cached_document(s3_key: str) -> CachedDocument | None:
+	"""Cached copy of the document, fetching or revalidating it against S3 when needed."""
+	cached = document_cache.get(s3_key)
+	if cached is not None and time.monotonic() - cached.validated_at < DOCUMENT_MAX_AGE:
+		return cached
+
+	s3_response = get_document(s3_key, **({'IfNoneMatch': cached.etag} if cached else {}))
+	if s3_response.get('NotModified'):
+		document_cache.mark_validated(s3_key)
+		return cached
+	if s3_response['ContentLength'] > document_cache.max_bytes:
+		s3_response['Body'].close()
+		document_cache.discard(s3_key)
+		return None
+	try:
+		file_content = s3_response['Body'].read()
+	except Exception as e:
+		raise StorageError(f"Error fetching file: {e}") from e
+	return document_cache.put(s3_key, file_content, s3_response['ETag'], s3_response['LastModified'])
+
+def _open_cached_document(s3_key: str) -> tuple[CachedDocument, BinaryIO] | None:
+	# another thread may evict the entry between the freshness check and the open;
+	# refetch once, then let the caller fall back to S3
+	opened = document_cache.open(s3_key)
+	if opened is None and _fresh_cached_document(s3_key) is not None:
+		opened = document_cache.open(s3_key)
+	return opened
+
+def _open_from_s3(s3_key: str, range_header: str | None, if_none_match: str | None, if_modified_since: str | None) -> DocumentObject:
+	params = {}
+	if range_header and _BYTE_RANGE.match(range_header.strip()):
+		params['Range'] = range_header.strip()
+	if if_none_match:
+		params['IfNoneMatch'] = if_none_match
+	elif _parse_http_date(if_modified_since):
+		params['IfModifiedSince'] = _parse_http_date(if_modified_since)
+
+	s3_response = get_document(s3_key, **params)
+	if s3_response.get('NotModified'):
+		return DocumentObject(etag=s3_response['ETag'], last_modified=s3_response['LastModified'])
+
+	byte_range = None
+	total_size = s3_response['ContentLength']
+	if 'ContentRange' in s3_response:  # "bytes 0-1023/146515"
+		span, total_size = s3_response['ContentRange'].split(' ', 1)[1].split('/')
+		byte_range = tuple(int(offset) for offset in span.split('-'))
+		total_size = int(total_size)
+	return DocumentObject(
+		etag=s3_response['ETag'],
+		last_modified=s3_response['LastModified'],
+		total_size=total_size,
+		body=s3_response['Body'].iter_chunks(CHUNK_SIZE),
+		byte_range=byte_range
+	)
+
+def open_document(
+		s3_key: str,
+		range_header: str | None = None,
+		if_none_match: str | None = None,
+		if_modified_since: str | None = None
+	) -> DocumentObject:
+	"""
+	Resolve a (conditional, possibly ranged) read of a document. Served from the local
+	disk cache when DOCUMENT_CACHE_DIR is set, otherwise passed straight through to S3.
+	"""
+	cached = _fresh_cached_document(s3_key) if document_cache is not None else None
+	if cached is not None and _is_not_modified(cached.etag, cached.last_modified, if_none_match, if_modified_since):
+		return DocumentObject(etag=cached.etag, last_modified=cached.last_modified, total_size=cached.size)
+
+	opened = _open_cached_document(s3_key) if cached is not None else None
+	if opened is None:
+		return _open_from_s3(s3_key, range_header, if_none_match, if_modified_since)
+
+	# headers come from the entry whose file was opened, which may be newer than `cached`
+	cached, f = opened
+	try:
+		byte_range = parse_byte_range(range_header, cached.size)
+	except RangeNotSatisfiableError:
+		f.close()
+		raise
+	start, end = byte_range or (0, cached.size - 1)
+	return DocumentObject(
+		etag=cached.etag,
+		last_modified=cached.last_modified,
+		total_size=cached.size,
+		body=_iter_file(f, start, end),
+		byte_range=byte_range
+	)
\ No newline at end of file
@@ -1,15 +1,15 @@
 import os
-from fastapi import HTTPException
+from .errors import InvalidInputError
 
 
 def validate_user_id(user_id: str):
 	if not user_id or user_id.__len__() == 0:
-		raise HTTPException(status_code=400, detail="Invalid user_id")
+		raise InvalidInputError("Invalid user_id")
 
 def validate_filename(filename: str):
 	if not filename:
-		raise HTTPException(status_code=400, detail="Filename cannot be empty.")
+		raise InvalidInputError("Filename cannot be empty.")
 	allowed_extensions = {".pdf", ".png", ".jpg", ".jpeg"}
 	file_extension = os.path.splitext(filename)[1].lower()
 	if file_extension not in allowed_extensions:
-		raise HTTPException(status_code=400, detail="Invalid file type. Only PDF, PNG, and JPEG are allowed.")
\ No newline at end of file
+		raise InvalidInputError("Invalid file type. Only PDF, PNG, and JPEG are allowed.")
\ No newline at end of file
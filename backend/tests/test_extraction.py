@@ -0,0 +1,45 @@
+import io
+import pymupdf
+import pytest
+from PIL import Image
+from app.services import extraction
+from app.services.errors import InvalidInputError
+
+
+def image_bytes(format: str) -> bytes:
+	buffer = io.BytesIO()
+	Image.new("RGB", (32, 32), "white").save(buffer, format=format)
+	return buffer.getvalue()
+
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+	# tesseract is a system binary; record what would have been OCR'd instead
+	images = []
+	def image_to_string(image):
+		images.append(image)
+		return " RECEIPT TOTAL 10.00 \n"
+	monkeypatch.setattr(extraction.pytesseract, "image_to_string", image_to_string)
+	return images
+
+
+@pytest.mark.parametrize("format", ["PNG", "JPEG"])
+def test_image_upload_is_ocrd_directly(fake_ocr, format):
+	assert extraction.extract_text(image_bytes(format)) == "RECEIPT TOTAL 10.00"
+	assert len(fake_ocr) == 1
+	assert fake_ocr[0].format == format
+
+def test_text_pdf_uses_markdown(fake_ocr):
+	doc = pymupdf.open()
+	doc.new_page().insert_text((72, 72), "Invoice INV-1")
+	assert "Invoice INV-1" in extraction.extract_text(doc.tobytes())
+	assert fake_ocr == []
+
+def test_scanned_pdf_falls_back_to_ocr(fake_ocr):
+	doc = pymupdf.open()
+	doc.new_page().insert_image(pymupdf.Rect(0, 0, 100, 100), stream=image_bytes("PNG"))
+	assert extraction.extract_text(doc.tobytes()) == "### Page 1, Image 1\n\nRECEIPT TOTAL 10.00"
+
+def test_empty_file_is_rejected():
+	with pytest.raises(InvalidInputError):
+		extraction.extract_text(b"")
\ No newline at end of file
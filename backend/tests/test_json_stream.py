@@ -0,0 +1,44 @@
+import pytest
+from app.services.errors import LLMOutputError
+from app.services.json_stream import JSONStreamExtractor, extract_json
+
+
+def feed_all(chunks):
+	extractor = JSONStreamExtractor()
+	return [value for chunk in chunks for value in extractor.feed(chunk)]
+
+
+def test_skips_prose_and_code_fences():
+	assert feed_all(['Sure! ```json\n[{"a": 1}]\n``` Done.']) == [[{"a": 1}]]
+
+def test_chunk_boundary_inside_string():
+	assert feed_all(['[{"text": "a ] } [', ' { still a string"}]']) == [[{"text": "a ] } [ { still a string"}]]
+
+def test_chunk_boundary_inside_escape():
+	assert feed_all(['{"q": "say \\', '"hi\\" ]"}']) == [{"q": 'say "hi" ]'}]
+
+def test_every_single_character_chunk():
+	text = 'x {"a": {"b": [1, "]"]}} y [2]'
+	assert feed_all(list(text)) == [{"a": {"b": [1, "]"]}}, [2]]
+
+def test_mismatched_brackets_are_rescanned():
+	assert feed_all(['oops {a] then {"k": 1}']) == [{"k": 1}]
+
+def test_trailing_commas_are_tolerated():
+	assert feed_all(['{"k": [1, 2,],}']) == [{"k": [1, 2]}]
+
+def test_incomplete_value_waits_for_more_input():
+	extractor = JSONStreamExtractor()
+	assert extractor.feed('[{"a": 1}, {"b"') == []
+	assert extractor.feed(': 2}]') == [[{"a": 1}, {"b": 2}]]
+
+
+def test_extract_json_skips_leading_bracketed_prose():
+	assert extract_json('see [1] then [{"date": "2024-01-02"}]') == [{"date": "2024-01-02"}]
+
+def test_extract_json_returns_empty_result_when_nothing_else():
+	assert extract_json("No issues found: []") == []
+
+def test_extract_json_without_json_raises():
+	with pytest.raises(LLMOutputError):
+		extract_json("I could not find any transactions [1].")
\ No newline at end of file
@@ -0,0 +1,19 @@
+import os
+import asyncio
+import pymupdf
+import pytest
+from app.services import extraction, pipeline, run_stage
+from app.services.errors import ExtractionError
+
+
+def test_extraction_runs_in_worker_process():
+	doc = pymupdf.open()
+	doc.new_page().insert_text((72, 72), "Invoice INV-1")
+	assert "Invoice INV-1" in asyncio.run(run_stage("extraction", extraction.extract_text, doc.tobytes()))
+
+def test_crashed_extraction_worker_is_replaced():
+	broken = pipeline._stage_executors["extraction"]
+	with pytest.raises(ExtractionError):
+		asyncio.run(run_stage("extraction", os._exit, 1))
+	assert pipeline._stage_executors["extraction"] is not broken
+	assert asyncio.run(run_stage("extraction", sum, [1, 2])) == 3
\ No newline at end of file
@@ -0,0 +1,88 @@
+import io
+import os
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.services import storage
+from app.services.document_cache import DocumentCache
+from app.services.errors import RangeNotSatisfiableError
+
+
+@pytest.mark.parametrize("header, expected", [
+	(None, None),
+	("bytes=0-", (0, 9)),
+	("bytes=2-5", (2, 5)),
+	("bytes=2-50", (2, 9)),
+	("bytes=-3", (7, 9)),
+	("bytes=-50", (0, 9)),
+	(" bytes=1-1 ", (1, 1)),
+	("bytes=5-3", None),        # invalid: ignored
+	("bytes=-", None),
+	("bytes=0-1,4-5", None),    # multi-part: whole document
+	("items=1-2", None),
+])
+def test_parse_byte_range(header, expected):
+	assert storage.parse_byte_range(header, 10) == expected
+
+@pytest.mark.parametrize("header", ["bytes=10-", "bytes=99-100", "bytes=-0"])
+def test_parse_byte_range_unsatisfiable(header):
+	with pytest.raises(RangeNotSatisfiableError) as e:
+		storage.parse_byte_range(header, 10)
+	assert e.value.total_size == 10
+
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+	cache = DocumentCache(str(tmp_path), 1024)
+	monkeypatch.setattr(storage, "document_cache", cache)
+	return cache
+
+@pytest.fixture
+def s3_object(monkeypatch):
+	"""What the fake S3 currently holds for every key; counts the get_object calls."""
+	current = {"body": b"0123456789", "etag": '"v1"', "calls": 0}
+	def get_document(s3_key, **params):
+		current["calls"] += 1
+		if params.get("IfNoneMatch") == current["etag"]:
+			return {"NotModified": True, "ETag": current["etag"], "LastModified": NOW}
+		return {
+			"ETag": current["etag"],
+			"LastModified": NOW,
+			"ContentLength": len(current["body"]),
+			"Body": io.BytesIO(current["body"])
+		}
+	monkeypatch.setattr(storage, "get_document", get_document)
+	return current
+
+def read(document):
+	return b"".join(document.body)
+
+
+def test_repeat_reads_are_served_from_cache(cache, s3_object):
+	assert read(storage.open_document("k")) == b"0123456789"
+	document = storage.open_document("k", range_header="bytes=2-4")
+	assert (read(document), document.byte_range, document.total_size) == (b"234", (2, 4), 10)
+	assert storage.open_document("k", if_none_match='"v1"').not_modified
+	assert s3_object["calls"] == 1
+
+def test_missing_cache_file_is_refetched(cache, s3_object):
+	storage.open_document("k")
+	cache._remove_files(cache.get("k"))  # e.g. evicted by another thread
+	assert read(storage.open_document("k")) == b"0123456789"
+	assert s3_object["calls"] == 2
+
+def test_new_version_does_not_disturb_open_stream(cache, s3_object):
+	document = storage.open_document("k")
+	cache.put("k", b"NEW", '"v2"', NOW + timedelta(seconds=1))
+	assert document.etag == '"v1"'
+	assert read(document) == b"0123456789"
+	assert read(storage.open_document("k")) == b"NEW"
+
+def test_older_version_never_replaces_newer(cache):
+	cache.put("k", b"new", '"v2"', NOW)
+	assert cache.put("k", b"old", '"v1"', NOW - timedelta(seconds=1)).etag == '"v2"'
+	entry, f = cache.open("k")
+	with f:
+		assert f.read() == b"new"
+	assert len(os.listdir(cache.directory)) == 2  # only the newer .bin and its sidecar
\ No newline at end of file
@@ -16,8 +16,100 @@ export function uploadFile(file: File) {
   });
 }
 
+// Uploads straight to S3 through a presigned URL, then asks the API to process it
+export async function uploadFileDirect(file: File) {
+  const presignResponse = await fetch(
+    `${process.env.NEXT_PUBLIC_API_URL}/v0/db/s3/presigned-upload?user_id=123&file_name=${encodeURIComponent(file.name)}`,
+    { method: "POST" },
+  );
+  if (!presignResponse.ok) {
+    const errorText = await presignResponse.text();
+    throw new Error(`Upload failed: ${presignResponse.status} - ${errorText}`);
+  }
+  const { url, s3_key } = await presignResponse.json();
+
+  const putResponse = await fetch(url, { method: "PUT", body: file });
+  if (!putResponse.ok) {
+    throw new Error(`Upload failed: ${putResponse.status} - ${await putResponse.text()}`);
+  }
+
+  return fetch(`${process.env.NEXT_PUBLIC_API_URL}/v0/db/upload-complete?user_id=123&s3_key=${encodeURIComponent(s3_key)}`, {
+    method: "POST",
+  }).then(async (res) => {
+    if (!res.ok) {
+      const errorText = await res.text();
+      throw new Error(`Upload failed: ${res.status} - ${errorText}`);
+    }
+    return res.json();
+  });
+}
+
+export type BatchUploadResult = {
+  index: number;
+  file_name: string;
+  result: any | null;
+  error: string | null;
+};
+
+export async function uploadFiles(files: File[], onResult: (result: BatchUploadResult) => void) {
+  const formData = new FormData();
+
+  files.forEach((file) => formData.append("files", file));
+
+  const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/v0/db/upload-and-process-batch?user_id=123`, {
+    method: "POST",
+    body: formData,
+  });
+
+  if (!response.ok) {
+    const errorText = await response.text();
+    throw new Error(`Batch upload failed: ${response.status} - ${errorText}`);
+  }
+
+  if (!response.body) {
+    throw new Error('Response body is null');
+  }
+
+  // One JSON object per line, emitted as each document finishes processing
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffered = "";
+
+  try {
+    while (true) {
+      const { done, value } = await reader.read();
+
+      if (done) break;
+
+      buffered += value;
+      const lines = buffered.split("\n");
+      buffered = lines.pop() ?? "";
+      for (const line of lines) {
+        if (line.trim()) onResult(JSON.parse(line));
+      }
+    }
+
+    if (buffered.trim()) onResult(JSON.parse(buffered));
+  } finally {
+    reader.releaseLock();
+  }
+}
+
+export async function getPresignedDownloadUrl(s3Key: string): Promise<string> {
+  const response = await fetch(
+    `${process.env.NEXT_PUBLIC_API_URL}/v0/db/s3/presigned-download?s3_key=${encodeURIComponent(s3Key)}`,
+  );
+  if (!response.ok) {
+    const errorText = await response.text();
+    throw new Error(`PDF stream failed: ${response.status} - ${errorText}`);
+  }
+  const { url } = await response.json();
+  return url;
+}
+
 export async function streamPDF(s3Key: string, onProgress?: (progress: number) => void) {
-  const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/v0/db/s3?s3_key=${s3Key}`, {
+  // Fetch the bytes straight from S3 rather than through the API
+  const url = await getPresignedDownloadUrl(s3Key);
+  const response = await fetch(url, {
     method: "GET",
     headers: {
       'Accept': 'application/pdf',
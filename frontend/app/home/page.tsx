@@ -3,7 +3,7 @@
 import { useState, useEffect, useRef } from "react";
 import { useMutation } from "@tanstack/react-query";
 import { toast } from "sonner";
-import { uploadFile, streamPDF } from "@/api/upload-file";
+import { uploadFileDirect, streamPDF } from "@/api/upload-file";
 import ExtractedResultCard from "./_components/extracted-result-card";
 import UploadCard, { UploadCardRef } from "./_components/upload-card";
 
@@ -20,7 +20,7 @@ export default function UploadPage() {
   const uploadCardRef = useRef<UploadCardRef>(null);
 
   const { mutate, isPending } = useMutation({
-    mutationFn: uploadFile,
+    mutationFn: uploadFileDirect,
     onSuccess: (data: UploadResponse) => {
       toast.success("Document uploaded and processed successfully!");
       setUploadResponse(data);